@@ -1,18 +1,211 @@
 # --- Export MySQL endpoint ---
-from flask import send_file
-import io
+import functools
+import itertools
+import operator
 import os
 import re
 import sqlite3
-from flask import Flask, request, jsonify
+import unicodedata
+from urllib.parse import quote
+from flask import Flask, Response, jsonify, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider, JSONProvider
 from flask_cors import CORS
 import mysql.connector
+import orjson
+
+# Doubles single quotes when rendering values as SQL string literals
+SQL_QUOTE_ESCAPE = str.maketrans({"'": "''"})
+
+# Bare table names (and optional aliases) referenced by FROM and JOIN clauses
+TABLE_REF_RE = re.compile(r'\bFROM\s+([A-Za-z_]\w*)\s*(\w+)?|\bJOIN\s+([A-Za-z_]\w*)\s*(\w+)?', re.IGNORECASE)
+
+# Normalized frontend column types -> SQLite column types
+SQL_TYPE_MAP = {
+    'INTEGER': 'INTEGER',
+    'DECIMAL': 'REAL',
+    'NUMERIC': 'NUMERIC',
+    'VARCHAR': 'TEXT',
+    'CHAR': 'TEXT',
+    'TEXT': 'TEXT',
+    'DATE': 'DATE',
+    'DATETIME': 'DATETIME',
+    'TIMESTAMP': 'DATETIME',
+    'TIME': 'TIME',
+    'BLOB': 'BLOB',
+    'BOOLEAN': 'BOOLEAN',
+}
+
+# Rows per multi-row INSERT when loading /query-temp tables, bounded so a statement never
+# binds more than SQLite's default SQLITE_MAX_VARIABLE_NUMBER parameters
+INSERT_CHUNK_ROWS = 500
+SQLITE_MAX_VARIABLES = 999
+
+# Result rows serialized per chunk when streaming /query-temp responses
+STREAM_BATCH_ROWS = 500
 
 CORS_origins = ["http://localhost:3000", "http://127.0.0.1:3000", "*"]
 
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider backed by orjson, used by request.get_json() and jsonify().
+
+    Follows DefaultJSONProvider's ``sort_keys`` and ``compact`` settings, but any
+    indent is rendered as two spaces, the only width orjson supports. Dates and
+    datetimes serialize as ISO 8601 strings rather than HTTP dates.
+    """
+
+    sort_keys = True
+    compact = None
+
+    def _option(self, sort_keys, indent):
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        option = self._option(kwargs.get('sort_keys', self.sort_keys), kwargs.get('indent'))
+        return orjson.dumps(obj, default=DefaultJSONProvider.default, option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(
+            orjson.dumps(obj, default=DefaultJSONProvider.default, option=self._option(self.sort_keys, indent)),
+            mimetype='application/json',
+        )
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app, origins=CORS_origins, supports_credentials=True)
 
+
+def row_getter(columns, default=None):
+    """Build a function returning a row's values for columns, in order, as a tuple."""
+    getter = operator.itemgetter(*columns)
+    single = len(columns) == 1
+
+    def row_values(row):
+        try:
+            values = getter(row)
+        except KeyError:
+            # Row is missing some columns; fall back to per-column lookups
+            return tuple(row.get(col, default) for col in columns)
+        return (values,) if single else values
+
+    return row_values
+
+
+def compile_insert_emitter(insert_prefix, columns):
+    """Generate a function rendering one row as an INSERT statement for this column list.
+
+    The per-column work is unrolled into the generated source so large exports do not
+    pay for a Python-level loop over the columns of every row.
+    """
+    body = []
+    literals = []
+    for idx, col in enumerate(columns):
+        body.append(f"    v{idx} = row.get({col!r}, '')")
+        literals.append(f"('NULL' if v{idx} is None else \"'\" + _str(v{idx}).translate(_escape) + \"'\")")
+    body.append(f"    return _prefix + ', '.join(({', '.join(literals)},)) + ');'")
+    src = 'def emit(row, _prefix=_prefix, _escape=_escape, _str=str):\n' + '\n'.join(body)
+    namespace = {'_prefix': insert_prefix, '_escape': SQL_QUOTE_ESCAPE}
+    exec(compile(src, '<insert-emitter>', 'exec'), namespace)
+    return namespace['emit']
+
+
+def blob_to_hex(value):
+    """orjson default for query results: BLOBs, the one SQLite value orjson cannot encode, become hex strings."""
+    if isinstance(value, bytes):
+        return value.hex()
+    raise TypeError
+
+
+def parse_constraints(constraints):
+    """Map column index -> (notnull, unique, primary) for columns that have constraints."""
+    return {
+        idx: ('notnull' in cons, 'unique' in cons, 'primary' in cons)
+        for idx, cons in enumerate(constraints or ())
+        if cons
+    }
+
+
+@functools.lru_cache(maxsize=256)
+def build_create_table_sql(table_name, columns, column_types, constraints, foreign_key):
+    """Build the CREATE TABLE statement for an in-memory query table.
+
+    Arguments are tuples so repeated queries against the same tables reuse the DDL:
+    constraints holds the (index, flags) items of parse_constraints() and foreign_key
+    is a (column, referenced_table, referenced_column) triple or None.
+    """
+    cons_by_idx = dict(constraints)
+    # Build column definitions with constraints
+    col_defs_list = []
+    pk_cols = []
+    unique_cols = []
+
+    for idx, col in enumerate(columns):
+        # Map frontend types to SQLite types
+        col_type = column_types[idx].upper() if idx < len(column_types) else 'TEXT'
+        sql_type = SQL_TYPE_MAP.get(col_type, 'TEXT')  # Default to TEXT for unknown types
+
+        col_def = f'"{col}" {sql_type}'
+        cons = cons_by_idx.get(idx)
+        if cons:
+            notnull, unique, primary = cons
+            if notnull:
+                col_def += ' NOT NULL'
+            if unique:
+                unique_cols.append(col)
+            if primary:
+                pk_cols.append(col)
+        col_defs_list.append(col_def)
+
+    # Add PRIMARY KEY and UNIQUE constraints at the table level if needed
+    table_constraints = []
+    if pk_cols:
+        pk_str = ', '.join([f'"{c}"' for c in pk_cols])
+        table_constraints.append(f'PRIMARY KEY ({pk_str})')
+    if unique_cols:
+        unique_str = ', '.join([f'"{c}"' for c in unique_cols])
+        table_constraints.append(f'UNIQUE ({unique_str})')
+    if foreign_key:
+        fk_column, referenced_table_name, primary_key_column = foreign_key
+        table_constraints.append(
+            f'FOREIGN KEY ("{fk_column}") REFERENCES "{referenced_table_name}" ("{primary_key_column}")'
+        )
+
+    # Combine column definitions and constraints
+    col_defs = ', '.join(col_defs_list + table_constraints)
+    return f'CREATE TABLE "{table_name}" ({col_defs})'
+
+
+@functools.lru_cache(maxsize=256)
+def build_insert_sql(table_name, column_count, row_count):
+    """Build a multi-row INSERT for an in-memory query table with row_count placeholder tuples."""
+    row_placeholders = '(' + ', '.join(['?'] * column_count) + ')'
+    return f'INSERT INTO "{table_name}" VALUES ' + ', '.join([row_placeholders] * row_count)
+
+
+def attachment_disposition(download_name):
+    """Content-Disposition parameters for an attachment, matching send_file's handling of non-ASCII names."""
+    try:
+        download_name.encode('ascii')
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', download_name)
+        simple = simple.encode('ascii', 'ignore').decode('ascii')
+        # safe = RFC 5987 attr-char
+        quoted = quote(download_name, safe="!#$&+-.^_`|~")
+        return {'filename': simple, 'filename*': f"UTF-8''{quoted}"}
+    return {'filename': download_name}
+
+
 @app.route('/export-mysql', methods=['POST'])
 def export_mysql():
     data = request.get_json()
@@ -22,21 +215,27 @@ def export_mysql():
     constraints = data.get('constraints', [])
     if not columns or not rows:
         return jsonify({'error': 'No data to export'}), 400
+    # Rows are rendered while streaming, after the status line is sent, so reject bad input up front
+    if not all(isinstance(col, str) for col in columns):
+        return jsonify({'error': 'Each column must be a string'}), 400
+    if not all(isinstance(row, dict) for row in rows):
+        return jsonify({'error': 'Each row must be an object'}), 400
     # Build column definitions with constraints
     col_defs_list = []
     pk_cols = []
     unique_cols = []
+    cons_by_idx = parse_constraints(constraints)
     for idx, col in enumerate(columns):
         col_def = f'`{col}` TEXT'
-        if constraints and idx < len(constraints):
-            cons = constraints[idx]
-            if cons:
-                if 'notnull' in cons:
-                    col_def += ' NOT NULL'
-                if 'unique' in cons:
-                    unique_cols.append(col)
-                if 'primary' in cons:
-                    pk_cols.append(col)
+        cons = cons_by_idx.get(idx)
+        if cons:
+            notnull, unique, primary = cons
+            if notnull:
+                col_def += ' NOT NULL'
+            if unique:
+                unique_cols.append(col)
+            if primary:
+                pk_cols.append(col)
         col_defs_list.append(col_def)
     # Add PRIMARY KEY and UNIQUE constraints at the table level if needed
     table_constraints = []
@@ -48,21 +247,21 @@ def export_mysql():
         table_constraints.append(f'UNIQUE ({unique_str})')
     all_defs = col_defs_list + table_constraints
     col_defs = ', '.join(all_defs)
-    sql_lines = [f"CREATE TABLE IF NOT EXISTS `{table}` ({col_defs});"]
-    for row in rows:
-        values = []
-        for col in columns:
-            val = row.get(col, '')
-            if val is None:
-                values.append('NULL')
-            else:
-                sval = str(val).replace("'", "''")
-                values.append(f"'{sval}'")
-        sql_lines.append(f"INSERT INTO `{table}` ({', '.join(f'`{col}`' for col in columns)}) VALUES ({', '.join(values)});")
-    sql_content = '\n'.join(sql_lines)
-    buf = io.BytesIO(sql_content.encode('utf-8'))
-    buf.seek(0)
-    return send_file(buf, mimetype='application/sql', as_attachment=True, download_name=f'{table}.sql')
+    create_sql = f"CREATE TABLE IF NOT EXISTS `{table}` ({col_defs});"
+
+    cols_sql = ', '.join(f'`{col}`' for col in columns)
+    insert_prefix = f"\nINSERT INTO `{table}` ({cols_sql}) VALUES ("
+    emit_insert = compile_insert_emitter(insert_prefix, columns)
+
+    # Stream the dump one statement at a time instead of building it in memory
+    def generate():
+        yield create_sql.encode('utf-8')
+        for row in rows:
+            yield emit_insert(row).encode('utf-8')
+
+    response = Response(stream_with_context(generate()), mimetype='application/sql')
+    response.headers.set('Content-Disposition', 'attachment', **attachment_disposition(f'{table}.sql'))
+    return response
 
 
 # Temporary SQL query endpoint for in-memory table
@@ -74,6 +273,8 @@ def query_temp():
         query = data.get('query')
         constraints = data.get('constraints')
         foreign_key_config = data.get('foreignKeyConfig')
+        # 'columnar' returns each row as a list ordered like 'columns' instead of a dict
+        columnar = data.get('rowFormat') == 'columnar'
 
         if not tables or not query:
             return jsonify({'error': 'Missing tables or query'}), 400
@@ -81,6 +282,11 @@ def query_temp():
         # Use in-memory SQLite for temp query
         conn = sqlite3.connect(':memory:')  # This creates a temporary database that exists only in RAM
         cur = conn.cursor()
+        # The database is throwaway, so skip durability work on every insert
+        cur.executescript(
+            'PRAGMA synchronous=OFF; PRAGMA journal_mode=MEMORY; PRAGMA temp_store=MEMORY; '
+            'PRAGMA locking_mode=EXCLUSIVE; PRAGMA cache_size=-65536;'
+        )
 
         # Extract actual table names used in the query
         table_mapping = {}
@@ -88,11 +294,11 @@ def query_temp():
         # Find all table references in the query using FROM and JOIN
         query_tables = []
         
-        # First extract bare table names from the query
-        table_pattern = r'\bFROM\s+([A-Za-z_]\w*)\s*(\w+)?|\bJOIN\s+([A-Za-z_]\w*)\s*(\w+)?'
-        
+        # Input table names keyed by lowercase name for case-insensitive lookup
+        tables_by_lower = {t.lower(): t for t in tables.keys()}
+
         # Find all matches in the query
-        for match in re.finditer(table_pattern, query, re.IGNORECASE):
+        for match in TABLE_REF_RE.finditer(query):
             # Get table name and alias from FROM clause
             from_table = match.group(1)
             from_alias = match.group(2)
@@ -111,14 +317,8 @@ def query_temp():
             else:
                 continue
             
-            # Check if this exact table name exists in input
-            matched_input_table = None
-            if table_name.lower() in [t.lower() for t in tables.keys()]:
-                # Find the exact match (preserving case)
-                for input_name in tables.keys():
-                    if input_name.lower() == table_name.lower():
-                        matched_input_table = input_name
-                        break
+            # Find the input table matching case-insensitively (preserving its case)
+            matched_input_table = tables_by_lower.get(table_name.lower())
             
             # Store table info - using exact table name from query
             table_info = {
@@ -132,19 +332,31 @@ def query_temp():
                 # Store the mapping using the exact name from the query
                 table_mapping[table_name] = alias if alias else table_name
 
-        # Sort tables so referenced (primary) tables are created first
-        def is_foreign_table(table_name):
-            if not foreign_key_config:
-                return False
-            return table_name.lower() == foreign_key_config.get('foreignTable', '').lower()
+        # Foreign key settings are request-constant, so resolve them once
+        fk_config = foreign_key_config or {}
+        fk_column = fk_config.get('foreignKeyColumn')
+        primary_table = fk_config.get('primaryTable')
+        primary_key_column = fk_config.get('primaryKeyColumn')
+        foreign_table = fk_config.get('foreignTable')
+        foreign_table_lower = (foreign_table or '').lower()
 
-        def is_primary_table(table_name):
-            if not foreign_key_config:
-                return False
-            return table_name.lower() == foreign_key_config.get('primaryTable', '').lower()
+        # Build the foreign key constraint for the foreign table if we have all needed info
+        foreign_key = None
+        if foreign_table and fk_column and primary_table and primary_key_column:
+            # Query table names keyed by lowercase name; reversed so the first occurrence wins
+            query_names_by_lower = {qt['name'].lower(): qt['name'] for qt in reversed(query_tables)}
+            # Reference the primary table by its exact name from the query
+            referenced_table_name = query_names_by_lower.get(primary_table.lower())
+            if referenced_table_name:
+                foreign_key = (fk_column, referenced_table_name, primary_key_column)
 
-        # Sort tables - primary tables first, then foreign key tables
-        sorted_tables = sorted(query_tables, key=lambda x: is_foreign_table(x['name']))
+        # Order tables so referenced (primary) tables are created before the foreign key table
+        primary_tables = [t for t in query_tables if t['name'].lower() != foreign_table_lower]
+        foreign_tables = [t for t in query_tables if t['name'].lower() == foreign_table_lower]
+        sorted_tables = primary_tables + foreign_tables
+
+        # Constraints apply by column index to every table, so resolve them once
+        parsed_constraints = tuple(parse_constraints(constraints).items())
         
         for query_table in sorted_tables:
             if not query_table['data']:
@@ -160,130 +372,66 @@ def query_temp():
             # Always use the original table name from query, not the alias
             table_name = query_table['name']
 
-            # Build column definitions with constraints
-            col_defs_list = []
-            pk_cols = []
-            unique_cols = []
-            
             # Get column types if provided
             column_types = table_data.get('types', ['TEXT'] * len(columns))
-            
-            for idx, col in enumerate(columns):
-                # Map frontend types to SQLite types
-                col_type = str(column_types[idx]).upper() if idx < len(column_types) else 'TEXT'
-                
-                # Map normalized frontend types to SQLite types
-                sql_type = {
-                    'INTEGER': 'INTEGER',
-                    'DECIMAL': 'REAL',
-                    'NUMERIC': 'NUMERIC',
-                    'VARCHAR': 'TEXT',
-                    'CHAR': 'TEXT',
-                    'TEXT': 'TEXT',
-                    'DATE': 'DATE',
-                    'DATETIME': 'DATETIME',
-                    'TIMESTAMP': 'DATETIME',
-                    'TIME': 'TIME',
-                    'BLOB': 'BLOB',
-                    'BOOLEAN': 'BOOLEAN',
-                }.get(col_type, 'TEXT')  # Default to TEXT for unknown types
-                
-                col_def = f'"{col}" {sql_type}'
-                if constraints and idx < len(constraints):
-                    cons = constraints[idx]
-                    if cons:
-                        if 'notnull' in cons:
-                            col_def += ' NOT NULL'
-                        if 'unique' in cons:
-                            unique_cols.append(col)
-                        if 'primary' in cons:
-                            pk_cols.append(col)
-                col_defs_list.append(col_def)
-
-            # Add PRIMARY KEY and UNIQUE constraints at the table level if needed
-            table_constraints = []
-
-            # Add primary key constraint if we have primary key columns
-            if pk_cols:
-                pk_str = ', '.join([f'"{c}"' for c in pk_cols])
-                table_constraints.append(f'PRIMARY KEY ({pk_str})')
-
-            # Add unique constraints if we have unique columns
-            if unique_cols:
-                unique_str = ', '.join([f'"{c}"' for c in unique_cols])
-                table_constraints.append(f'UNIQUE ({unique_str})')
-            
-            # Add foreign key constraint if configured
-            if foreign_key_config:
-                fk_column = foreign_key_config.get('foreignKeyColumn')
-                primary_table = foreign_key_config.get('primaryTable')
-                primary_key_column = foreign_key_config.get('primaryKeyColumn')
-                foreign_table = foreign_key_config.get('foreignTable')
-                
-                # Check if this is the foreign table and we have all needed info
-                if foreign_table and foreign_table.lower() == query_table['name'].lower() and fk_column and primary_table and primary_key_column:
-                    # Find the referenced table's name as it appears in the query
-                    referenced_table_name = None
-                    for qt in query_tables:
-                        if qt['name'].lower() == primary_table.lower():
-                            referenced_table_name = qt['name']  # Use the exact name from query
-                            break
-                            
-                    if referenced_table_name:
-                        table_constraints.append(
-                            f'FOREIGN KEY ("{fk_column}") REFERENCES "{referenced_table_name}" ("{primary_key_column}")'
-                        )
-
-            # Combine column definitions and constraints
-            all_defs = col_defs_list + table_constraints
-            col_defs = ', '.join(all_defs)
-            
+
             # Create table using the query table name
-            create_table_sql = f'CREATE TABLE "{table_name}" ({col_defs})'
+            create_table_sql = build_create_table_sql(
+                table_name,
+                tuple(columns),
+                tuple(map(str, column_types)),
+                parsed_constraints,
+                foreign_key if table_name.lower() == foreign_table_lower else None,
+            )
             result = cur.execute(create_table_sql)
             
-            # Insert rows using the query table name
-            placeholders = ', '.join(['?'] * len(columns))
-            for row in rows:
-                vals = [row.get(col, None) for col in columns]
-                sql = f'INSERT INTO "{table_name}" VALUES ({placeholders})'
-                result = cur.execute(sql, vals)
-            
-            # Verify the inserted data
-            result = cur.execute(f'SELECT * FROM "{table_name}" LIMIT 3')
-            rows = result.fetchall()
+            # Insert rows using the query table name, several rows per statement in a single transaction
+            chunk_rows = max(1, min(INSERT_CHUNK_ROWS, SQLITE_MAX_VARIABLES // len(columns)))
+            row_values = row_getter(columns)
+            conn.execute('BEGIN')
+            for start in range(0, len(rows), chunk_rows):
+                chunk = rows[start:start + chunk_rows]
+                cur.execute(
+                    build_insert_sql(table_name, len(columns), len(chunk)),
+                    list(itertools.chain.from_iterable(map(row_values, chunk))),
+                )
+            conn.commit()
 
         try:
-            # Verify table structure before executing query
-            for table in sorted_tables:
-                cur.execute(f"SELECT * FROM sqlite_master WHERE type='table' AND name=?", (table['name'],))
-                table_info = cur.fetchone()
-                if table_info:
-                    # Show sample data
-                    cur.execute(f'SELECT * FROM "{table["name"]}" LIMIT 1')
-                    sample = cur.fetchone()
-
-            result = cur.execute(query)
-            result_rows = result.fetchall()
+            cur.execute(query)
             result_cols = [desc[0] for desc in cur.description]
-            
-            # Convert to list of dicts and show sample results
-            result = [dict(zip(result_cols, row)) for row in result_rows]
+
+            def encode_batch(batch):
+                if columnar:
+                    return orjson.dumps(batch, default=blob_to_hex)
+                return orjson.dumps([dict(zip(result_cols, row)) for row in batch], default=blob_to_hex)
+
+            # Fetch the first batch eagerly so errors raised while stepping the query still produce an error response
+            first_batch = encode_batch(cur.fetchmany(STREAM_BATCH_ROWS))
         except sqlite3.Error as e:
             return jsonify({'error': f'Query execution failed: {str(e)}'}), 400
         
-        response_data = {
-            'columns': result_cols, 
-            'rows': result,
-            'metadata': {
-                'tables': list(tables.keys()),
-                'constraints': constraints,
-                'foreign_keys': foreign_key_config,
-                'execution_type': 'in_memory_sqlite'
-            }
+        metadata = {
+            'tables': list(tables.keys()),
+            'constraints': constraints,
+            'foreign_keys': foreign_key_config,
+            'execution_type': 'in_memory_sqlite'
         }
-        
-        return jsonify(response_data)
+
+        # Stream rows from the cursor in batches rather than materializing the whole result
+        def generate(cur=cur):
+            yield b'{"columns":' + orjson.dumps(result_cols) + b',"rows":[' + first_batch[1:-1]
+            batch = cur.fetchmany(STREAM_BATCH_ROWS)
+            while batch:
+                yield b',' + encode_batch(batch)[1:-1]
+                batch = cur.fetchmany(STREAM_BATCH_ROWS)
+            yield b'],"metadata":' + orjson.dumps(metadata) + b'}'
+
+        response = app.response_class(stream_with_context(generate()), mimetype='application/json')
+        # The response now owns the connection and closes it once the body is sent
+        response.call_on_close(conn.close)
+        conn = None
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 400
     finally:
@@ -301,13 +449,20 @@ DB_CONFIG = {
     'database': os.environ.get('MYSQL_DATABASE', 'repairdb')
 }
 
+# Connections come from a process-level pool so requests skip the connect/auth handshake
+DB_POOL_CONFIG = {
+    'pool_name': 'repair',
+    'pool_size': int(os.environ.get('MYSQL_POOL_SIZE', 8))
+}
+
 def get_db_connection():
-    return mysql.connector.connect(**DB_CONFIG)
+    return mysql.connector.connect(**DB_POOL_CONFIG, **DB_CONFIG)
 
 @app.route('/')
 def index():
     return 'Database Repair API is running!'
 
 
+# Development server only; use gunicorn (see gunicorn.conf.py) in production
 if __name__ == '__main__':
     app.run(debug=True)
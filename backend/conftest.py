@@ -1,10 +1,13 @@
 """
 Shared pytest fixtures and configuration for the database repair application tests.
 """
+import functools
+import json
 import pytest
 import os
+import sqlite3
 import tempfile
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 from app import app
 
 
@@ -19,12 +22,66 @@ def test_app():
     return app
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def client(test_app):
-    """Create a test client for the Flask application."""
+    """Create a test client shared by the whole session; the app keeps no state between requests."""
     return test_app.test_client()
 
 
+def _fast_mem_conn():
+    """Open an in-memory SQLite connection with journaling and syncing turned off."""
+    conn = sqlite3.connect(':memory:')
+    conn.executescript(
+        "PRAGMA journal_mode=MEMORY; PRAGMA synchronous=OFF; "
+        "PRAGMA temp_store=MEMORY; PRAGMA locking_mode=EXCLUSIVE;"
+    )
+    return conn
+
+
+@pytest.fixture(scope="session")
+def sqlite_template():
+    """In-memory SQLite database holding the schemas used by the SQLite tests, built once."""
+    template = _fast_mem_conn()
+    template.executescript('''
+        CREATE TABLE test_table (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            email TEXT UNIQUE,
+            age INTEGER
+        );
+        CREATE TABLE customers (
+            id INTEGER PRIMARY KEY,
+            name TEXT
+        );
+        CREATE TABLE orders (
+            id INTEGER PRIMARY KEY,
+            customer_id INTEGER,
+            FOREIGN KEY (customer_id) REFERENCES customers (id)
+        );
+    ''')
+    yield template
+    template.close()
+
+
+@pytest.fixture(scope="module")
+def mem_conn(sqlite_template):
+    """In-memory SQLite database shared by a test module, cloned once from the session template."""
+    conn = _fast_mem_conn()
+    sqlite_template.backup(conn)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def sqlite_conn(mem_conn):
+    """The module's shared SQLite connection; uncommitted writes and foreign key enforcement are reset after each test."""
+    try:
+        yield mem_conn
+    finally:
+        mem_conn.rollback()
+        mem_conn.execute("PRAGMA foreign_keys = OFF")
+
+
 @pytest.fixture
 def runner(test_app):
     """Create a test runner for the Flask application."""
@@ -42,6 +99,12 @@ def mock_db_config():
     }
 
 
+@pytest.fixture
+def mock_conn():
+    """Per-test MagicMock standing in for a MySQL connection."""
+    return MagicMock()
+
+
 @pytest.fixture(autouse=True)
 def mock_environment_variables():
     """Mock environment variables for testing."""
@@ -54,6 +117,68 @@ def mock_environment_variables():
         yield
 
 
+@pytest.fixture(scope="session")
+def sample_table_data():
+    """Sample table data for testing (shared across the session, do not mutate)."""
+    return {
+        'columns': ['id', 'name', 'email'],
+        'rows': [
+            {'id': 1, 'name': 'John Doe', 'email': 'john@example.com'},
+            {'id': 2, 'name': 'Jane Smith', 'email': 'jane@example.com'}
+        ],
+        'types': ['INTEGER', 'TEXT', 'TEXT']
+    }
+
+
+@pytest.fixture(scope="session")
+def sample_constraints():
+    """Sample constraints for testing (shared across the session, do not mutate)."""
+    return [
+        ['primary'],  # id column
+        ['notnull'],  # name column
+        ['unique']    # email column
+    ]
+
+
+@pytest.fixture(scope="session")
+def export_mysql_payload_bytes(sample_table_data, sample_constraints):
+    """Pre-serialized /export-mysql request body for the users sample table."""
+    return json.dumps({
+        'table': 'users',
+        'columns': sample_table_data['columns'],
+        'rows': sample_table_data['rows'],
+        'constraints': sample_constraints
+    }).encode()
+
+
+@pytest.fixture(scope="session")
+def query_temp_select_payload_bytes(sample_table_data):
+    """Pre-serialized /query-temp request body selecting every row of the users sample table."""
+    return json.dumps({
+        'tables': {'users': sample_table_data},
+        'query': 'SELECT * FROM users',
+        'constraints': [['primary'], ['notnull'], ['unique']]
+    }).encode()
+
+
+@pytest.fixture(scope="session")
+def large_table_payload_bytes():
+    """Return a cached builder of /query-temp request bodies counting an n-row large_table."""
+    @functools.lru_cache(maxsize=None)
+    def build(n):
+        return json.dumps({
+            'tables': {'large_table': {
+                'columns': ['id', 'data'],
+                'rows': [{'id': i, 'data': f'data_{i}'} for i in range(n)],
+                'types': ['INTEGER', 'TEXT']
+            }},
+            'query': 'SELECT COUNT(*) as count FROM large_table',
+            'constraints': [['primary'], []]
+        }).encode()
+
+    return build
+
+
 @pytest.fixture
 def sample_customers_data():
     """Sample customers table data."""
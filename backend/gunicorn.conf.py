@@ -0,0 +1,13 @@
+"""
+Gunicorn settings for serving the database repair API in production.
+
+Gunicorn picks this file up automatically when started from the backend folder:
+    gunicorn app:app
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
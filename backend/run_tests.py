@@ -3,11 +3,13 @@
 Test runner script for the database repair application.
 
 Usage:
-    python run_tests.py                    # Run all tests
+    python run_tests.py                    # Run all tests except slow ones
     python run_tests.py --unit            # Run only unit tests
     python run_tests.py --integration     # Run only integration tests
     python run_tests.py --coverage        # Run tests with coverage report
     python run_tests.py --verbose         # Run with verbose output
+    python run_tests.py --all             # Include slow tests (skipped by default)
+    python run_tests.py --parallel        # Spread tests across all CPU cores (pytest-xdist)
 """
 
 import sys
@@ -60,6 +62,8 @@ def main():
     parser.add_argument("--coverage", action="store_true", help="Run with coverage report")
     parser.add_argument("--verbose", action="store_true", help="Verbose output")
     parser.add_argument("--fast", action="store_true", help="Skip slow tests")
+    parser.add_argument("--all", action="store_true", help="Include slow tests")
+    parser.add_argument("--parallel", action="store_true", help="Run tests across all CPU cores")
     parser.add_argument("--file", type=str, help="Run specific test file")
     
     args = parser.parse_args()
@@ -93,6 +97,12 @@ def main():
         pytest_cmd.extend(["-m", "integration"])
     elif args.fast:
         pytest_cmd.extend(["-m", "not slow"])
+    elif args.all:
+        pytest_cmd.extend(["-m", ""])
+    
+    # Distribute tests across worker processes
+    if args.parallel:
+        pytest_cmd.extend(["-n", "auto"])
     
     # Add specific file if requested
     if args.file: